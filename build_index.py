@@ -1,165 +1,307 @@
 import sys
 import os
 import json
-import re
-from collections import defaultdict
+import struct
+from array import array
+from operator import sub, lt
+from itertools import accumulate, chain
+from concurrent.futures import ProcessPoolExecutor
 import time
 
-# --- Tokenizer (reused from Task 1) ---
-def tokenize(text: str, stopwords: set) -> list:
-    text = text.lower()
-    text = re.sub(r'\d', '', text)
-    raw_tokens = text.split()
-    return [token for token in raw_tokens if token not in stopwords]
+# The tokenizer and corpus reader are shared with Task 1
+from tokenize_corpus import read_json_lines, tokenize
 
 # --- VByte Encoder/Decoder ---
-def vbyte_encode(n: int) -> bytearray:
-    """Encodes an integer into a V-Byte byte array."""
-    if n < 0:
-        raise ValueError(f"Cannot encode negative number: {n}")
-    if n == 0:
-        return bytearray([128])
-    
-    bytes_list = []
-    while n > 0:
-        byte = n % 128
-        n //= 128
-        bytes_list.append(byte) # Append is much faster
-    
-    bytes_list.reverse() # Reverse the list once at the end
-    
-    bytes_list[-1] |= 0x80 # Set MSB of last byte to 1
-    return bytearray(bytes_list)
+def vbyte_encode_stream(numbers, out: bytearray) -> int:
+    """Appends the V-Byte encoding of every integer in `numbers` to `out`.
+
+    Returns the number of bytes written.
+    """
+    start = len(out)
+    append = out.append
+    for n in numbers:
+        if n < 128:
+            if n < 0:
+                raise ValueError(f"Cannot encode negative number: {n}")
+            append(n | 0x80) # Single byte, MSB marks the end
+            continue
+
+        # Emit 7-bit groups most significant first; only the last has the MSB set
+        shift = (n.bit_length() - 1) // 7 * 7
+        while shift:
+            append((n >> shift) & 0x7F)
+            shift -= 7
+        append((n & 0x7F) | 0x80)
+    return len(out) - start
+
+def delta_encode(values: list):
+    """Returns the gaps of a sorted list, the first one taken from 0."""
+    return map(sub, values, [0] + values[:-1])
 
 # --- Inverted Index Logic ---
+_worker_vocab = None
+
+def _init_worker(vocab: frozenset) -> None:
+    """Hands the vocabulary to a worker once instead of pickling it per shard."""
+    global _worker_vocab
+    _worker_vocab = vocab
+
+def _index_file(filepath: str):
+    """Indexes a single corpus shard. Returns its partial index and doc IDs."""
+    vocab = _worker_vocab
+    stopwords = set() # Assume vocab is already stop-filtered
+
+    # term -> flat arrays: the doc numbers (index into doc_ids), how many
+    # positions each doc has, and all positions back to back
+    partial_index = {}
+    doc_ids = []
+    add_doc_id = doc_ids.append
+
+    for doc in read_json_lines(filepath):
+        doc_id = doc.get('doc_id')
+        if not doc_id: continue
+        doc_number = len(doc_ids)
+        add_doc_id(doc_id)
+        
+        doc_content = []
+        for key, value in doc.items():
+            if key != 'doc_id':
+                doc_content.append(str(value))
+        
+        full_text = ' '.join(doc_content)
+        tokens = tokenize(full_text, stopwords)
+        
+        # Group positions per term within the document first, so the
+        # shard-wide index is touched once per distinct term, not per token
+        doc_positions = {}
+        for pos, token in enumerate(tokens):
+            if token in vocab:
+                positions = doc_positions.get(token)
+                if positions is None:
+                    doc_positions[token] = [pos]
+                else:
+                    positions.append(pos)
+
+        for token, positions in doc_positions.items():
+            entry = partial_index.get(token)
+            if entry is None:
+                entry = partial_index[token] = {
+                    'docs': array('I'), 'counts': array('I'), 'pos': array('I')
+                }
+            entry['docs'].append(doc_number)
+            entry['counts'].append(len(positions))
+            entry['pos'].extend(positions)
+
+    return partial_index, doc_ids
+
+def sort_postings(entry: dict) -> None:
+    """Puts a term's arrays in doc order, merging repeated doc IDs.
+
+    Shards list docs in file order, which need not match doc_id order.
+    Positions within one document are already ascending, so they only
+    need re-sorting when a doc_id occurs more than once.
+    """
+    docs = entry['docs']
+    if all(map(lt, docs, docs[1:])):
+        return # Already strictly ascending
+    counts, pos = entry['counts'], entry['pos']
+    starts = list(accumulate(counts, initial=0))
+
+    sorted_docs, sorted_counts, sorted_pos = array('I'), array('I'), array('I')
+    for i in sorted(range(len(docs)), key=docs.__getitem__):
+        chunk = pos[starts[i]:starts[i + 1]]
+        if sorted_docs and sorted_docs[-1] == docs[i]:
+            tail_start = len(sorted_pos) - sorted_counts[-1]
+            chunk = sorted(sorted_pos[tail_start:] + chunk)
+            del sorted_pos[tail_start:]
+            sorted_counts[-1] = len(chunk)
+        else:
+            sorted_docs.append(docs[i])
+            sorted_counts.append(len(chunk))
+        sorted_pos.extend(chunk)
+    entry['docs'], entry['counts'], entry['pos'] = sorted_docs, sorted_counts, sorted_pos
+
+def iter_postings(entry: dict):
+    """Yields (doc, positions) pairs of a sorted term entry."""
+    pos = entry['pos']
+    start = 0
+    for doc, count in zip(entry['docs'], entry['counts']):
+        end = start + count
+        yield doc, pos[start:end].tolist()
+        start = end
+
+class InvertedIndex(dict):
+    """Maps terms to their postings arrays; doc numbers index into doc_ids."""
+    def __init__(self, doc_ids: list):
+        super().__init__()
+        self.doc_ids = doc_ids # Sorted, so doc number order is doc_id order
+
 def build_index(corpus_dir: str, vocab_path: str):
-    """Builds a positional inverted index."""
+    """Builds a positional inverted index.
+
+    Each term maps to flat 'docs', 'counts' and 'pos' arrays in doc order;
+    doc numbers index into the returned sorted list of doc IDs, which the
+    index also carries as its doc_ids attribute.
+    """
     try:
         with open(vocab_path, 'r', encoding='utf-8') as f:
-            vocab = set(line.strip() for line in f)
+            vocab = frozenset(line.strip() for line in f)
     except FileNotFoundError:
         print(f"Error: Vocabulary file not found at {vocab_path}")
         return None, None
 
-    # This is a bit inefficient for very large corpora but simple.
-    stopwords = set() # Assume vocab is already stop-filtered
+    filepaths = [os.path.join(corpus_dir, filename)
+                 for filename in sorted(os.listdir(corpus_dir))
+                 if filename.endswith(".json")]
+
+    workers = min(os.cpu_count() or 1, len(filepaths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(vocab,)) as executor:
+            results = list(executor.map(_index_file, filepaths))
+    else:
+        _init_worker(vocab)
+        results = list(map(_index_file, filepaths))
+
+    all_doc_ids = sorted(set(doc_id for _, doc_ids in results for doc_id in doc_ids))
+    doc_rank = {doc_id: i for i, doc_id in enumerate(all_doc_ids)}
 
-    inverted_index = defaultdict(lambda: defaultdict(list))
-    all_doc_ids = set()
-
-    for filename in sorted(os.listdir(corpus_dir)):
-        if filename.endswith(".json"):
-            filepath = os.path.join(corpus_dir, filename)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip(): # Ensure the line is not empty
-                        # Use json.loads(line) to parse the string from the current line
-                        doc = json.loads(line) 
-                        
-                        doc_id = doc.get('doc_id')
-                        if not doc_id: continue
-                        all_doc_ids.add(doc_id)
-                        
-                        doc_content = []
-                        for key, value in doc.items():
-                            if key != 'doc_id':
-                                doc_content.append(str(value))
-                        
-                        full_text = ' '.join(doc_content)
-                        tokens = tokenize(full_text, stopwords)
-                        
-                        for pos, token in enumerate(tokens):
-                            if token in vocab:
-                                inverted_index[token][doc_id].append(pos)
+    # Shards are merged in file order, so positions stay in document order.
+    # Shard-local doc numbers are renumbered to their rank in all_doc_ids.
+    inverted_index = InvertedIndex(all_doc_ids)
+    for partial_index, doc_ids in results:
+        rank = [doc_rank[doc_id] for doc_id in doc_ids]
+        for term, entry in partial_index.items():
+            entry['docs'] = array('I', map(rank.__getitem__, entry['docs']))
+            merged = inverted_index.get(term)
+            if merged is None:
+                inverted_index[term] = entry
+            else:
+                for key, values in entry.items():
+                    merged[key].extend(values)
+
+    # Order every postings list once here, so the writers never sort
+    for entry in inverted_index.values():
+        sort_postings(entry)
     
-    return inverted_index, sorted(list(all_doc_ids))
+    return inverted_index, all_doc_ids
+
+def save_index(inverted_index: InvertedIndex, index_dir: str) -> None:
+    """Saves the uncompressed index to a JSON file.
 
-def save_index(inverted_index, index_dir: str) -> None:
-    """Saves the uncompressed index to a JSON file."""
+    Expects the InvertedIndex returned by build_index: its doc_ids attribute
+    maps doc numbers back to doc IDs, and each term holds the flat 'docs',
+    'counts' and 'pos' arrays. The file is streamed one term per line, so the whole sorted index is
+    never held in memory as a second nested dict.
+    """
     if not os.path.exists(index_dir):
         os.makedirs(index_dir)
         
-    # Sort terms and doc_ids lexicographically
-    sorted_index = {}
-    for term in sorted(inverted_index.keys()):
-        sorted_postings = {}
-        for doc_id in sorted(inverted_index[term].keys()):
-            positions = inverted_index[term][doc_id]
-            positions.sort()
-            sorted_postings[doc_id] = positions
-        sorted_index[term] = sorted_postings
-        
-        
+    encode = json.JSONEncoder(separators=(',', ':')).encode
     index_path = os.path.join(index_dir, 'index.json')
     with open(index_path, 'w', encoding='utf-8') as f:
-        json.dump(sorted_index, f, indent=4)
+        f.write('{')
+        separator = '\n'
+        # Terms sorted lexicographically; doc numbers already follow doc_id order
+        all_doc_ids = inverted_index.doc_ids
+        for term in sorted(inverted_index.keys()):
+            sorted_postings = {all_doc_ids[doc]: positions
+                               for doc, positions in iter_postings(inverted_index[term])}
+            f.write(f"{separator}{encode(term)}:{encode(sorted_postings)}")
+            separator = ',\n'
+        f.write('\n}\n')
     print(f"Uncompressed index saved to {index_path}")
 
 # --- Index Compression Logic ---
+WRITE_BATCH_SIZE = 4 * 1024 * 1024 # Flush encoded postings in ~4 MiB writes
+SKIP_BLOCK_SIZE = 128 # Doc IDs per skip-pointer block for long postings lists
+# One fixed-size lexicon.bin record per term, in terms.txt order; zero
+# skip_size means the term has no skip table
+LEXICON_FIELDS = ('offset', 'size', 'doc_size', 'doc_count', 'skip_size')
+LEXICON_RECORD = struct.Struct('<QIIII')
+
 def compress_index(inverted_index, all_doc_ids, compressed_dir: str) -> None:
     """Compresses the index using Delta and V-Byte encoding."""
     if not os.path.exists(compressed_dir):
         os.makedirs(compressed_dir)
 
-    # 1. DocID mapping
-    doc_id_map = {doc_id: i for i, doc_id in enumerate(all_doc_ids)}
-    int_to_doc_id_map = {i: doc_id for doc_id, i in doc_id_map.items()}
+    # 1. DocID mapping: the index already numbers docs by their rank, so
+    # line i of doc_ids.txt is the doc ID of internal ID i
+    doc_ids_path = os.path.join(compressed_dir, 'doc_ids.txt')
+    with open(doc_ids_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(''.join(f"{doc_id}\n" for doc_id in all_doc_ids))
 
-    lexicon = {}
+    terms = sorted(inverted_index.keys())
+    lexicon_records = bytearray()
     compressed_index_path = os.path.join(compressed_dir, 'compressed_index.bin')
 
     with open(compressed_index_path, 'wb') as f:
         current_offset = 0
-        for term in sorted(inverted_index.keys()):
-            postings = inverted_index[term]
-            
-            int_doc_ids = sorted([doc_id_map[doc_id] for doc_id in postings.keys()])
+        write_buffer = bytearray()
+        for term in terms:
+            entry = inverted_index[term]
+            int_doc_ids = entry['docs'].tolist()
 
             # Delta encode doc IDs
-            last_doc_id = 0
-            encoded_postings = bytearray()
-            for doc_id in int_doc_ids:
-                delta = doc_id - last_doc_id
-                encoded_postings.extend(vbyte_encode(delta))
-                last_doc_id = doc_id
-
-            # Also encode positions for each doc
-            for int_doc_id in int_doc_ids:
-                string_doc_id = int_to_doc_id_map[int_doc_id]
-                positions = postings[string_doc_id]
-                
-                # --- ADD THIS LINE TO FIX THE BUG ---
-                positions.sort() # Ensure the positions list is always sorted
-                # ------------------------------------
-                
-                # Delta encode positions
-                last_pos = 0
-                for pos in positions:
-                    delta = pos - last_pos
-                    encoded_postings.extend(vbyte_encode(delta))
-                    last_pos = pos
-
-            f.write(encoded_postings)
-            
-            term_length = len(encoded_postings)
-            position_counts = [len(postings[int_to_doc_id_map[doc_id]]) for doc_id in int_doc_ids]
-            lexicon[term] = {
-                'offset': current_offset, 
-                'size': term_length,
-                'doc_count': len(postings),
-                'pos_counts': position_counts # Add the list of position counts
-            }
-            current_offset += term_length
+            doc_deltas = list(delta_encode(int_doc_ids))
+
+            # Also encode positions: one block per doc holding its position
+            # count followed by the position gaps (reset to 0 for every doc)
+            pos_deltas = []
+            for _, positions in iter_postings(entry):
+                pos_deltas.append(len(positions))
+                pos_deltas.extend(delta_encode(positions))
+
+            # Doc-ID stream first, positions stream right after it.
+            # Terms are encoded into one shared buffer that is written in
+            # large batches instead of one small write per term.
+            # The doc-ID stream is encoded in blocks of SKIP_BLOCK_SIZE so the
+            # first doc ID and byte offset of each block can be recorded.
+            block_first_docs = []
+            block_offsets = []
+            doc_stream_length = 0
+            for start in range(0, len(doc_deltas), SKIP_BLOCK_SIZE):
+                block_first_docs.append(int_doc_ids[start])
+                block_offsets.append(doc_stream_length)
+                doc_stream_length += vbyte_encode_stream(
+                    doc_deltas[start:start + SKIP_BLOCK_SIZE], write_buffer)
+            term_length = doc_stream_length + vbyte_encode_stream(pos_deltas, write_buffer)
+
+            # Long lists get a skip table after the streams: (first doc ID, byte
+            # offset) per block, both delta encoded and interleaved
+            skip_size = 0
+            if len(block_offsets) > 1:
+                skips = zip(delta_encode(block_first_docs), delta_encode(block_offsets))
+                skip_size = vbyte_encode_stream(chain.from_iterable(skips), write_buffer)
+
+            if len(write_buffer) >= WRITE_BATCH_SIZE:
+                f.write(write_buffer)
+                write_buffer.clear()
             
+            # Positions stream starts at offset + doc_size and the skip
+            # table (if any) at offset + size
+            lexicon_records += LEXICON_RECORD.pack(
+                current_offset, term_length, doc_stream_length, len(int_doc_ids), skip_size)
+            current_offset += term_length + skip_size
+        f.write(write_buffer)
+
+    # Lexicon: the sorted terms as text, their entries as packed records,
+    # so the reader needs no JSON parsing or per-term dicts at startup
+    with open(os.path.join(compressed_dir, 'terms.txt'), 'w', encoding='utf-8', newline='') as f:
+        f.write(''.join(term + '\n' for term in terms))
+    with open(os.path.join(compressed_dir, 'lexicon.bin'), 'wb') as f:
+        f.write(lexicon_records)
+
     # Save metadata
     metadata = {
-        'lexicon': lexicon,
-        'doc_id_map': int_to_doc_id_map,
-        'total_docs': len(all_doc_ids)
+        'lexicon_fields': LEXICON_FIELDS,
+        'lexicon_record': LEXICON_RECORD.format,
+        'total_docs': len(all_doc_ids),
+        'skip_block_size': SKIP_BLOCK_SIZE
     }
     metadata_path = os.path.join(compressed_dir, 'metadata.json')
     with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f)
+        json.dump(metadata, f, separators=(',', ':')) # Compact: smaller file, faster load
         
     print(f"Compressed index and metadata saved in {compressed_dir}")
 
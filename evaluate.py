@@ -1,5 +1,7 @@
 import sys
 import os
+from itertools import compress, count
+from operator import truediv
 
 def load_qrels(qrels_path):
     """
@@ -10,14 +12,10 @@ def load_qrels(qrels_path):
     qrels = {}
     try:
         with open(qrels_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) == 4:
-                    qid, _, docid, relevance = parts
-                    if int(relevance) > 0:
-                        if qid not in qrels:
-                            qrels[qid] = set()
-                        qrels[qid].add(docid)
+            # map(str.split, f) splits each line in C, no per-line strip()
+            for parts in map(str.split, f):
+                if len(parts) == 4 and int(parts[3]) > 0:
+                    qrels.setdefault(parts[0], set()).add(parts[2])
     except FileNotFoundError:
         print(f"Error: Qrels file not found at {qrels_path}")
         sys.exit(1)
@@ -31,13 +29,9 @@ def load_results(results_path):
     results = {}
     try:
         with open(results_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                parts = line.strip().split()
+            for parts in map(str.split, f):
                 if len(parts) == 6:
-                    qid, _, docid, _, _, _ = parts
-                    if qid not in results:
-                        results[qid] = []
-                    results[qid].append(docid)
+                    results.setdefault(parts[0], []).append(parts[2])
     except FileNotFoundError:
         print(f"Error: Results file not found at {results_path}")
         sys.exit(1)
@@ -48,18 +42,11 @@ def calculate_average_precision(retrieved_docs, relevant_docs):
     if not retrieved_docs or not relevant_docs:
         return 0.0
 
-    precision_scores = []
-    num_retrieved_relevant = 0
-    for i, doc_id in enumerate(retrieved_docs):
-        if doc_id in relevant_docs:
-            num_retrieved_relevant += 1
-            precision_at_k = num_retrieved_relevant / (i + 1)
-            precision_scores.append(precision_at_k)
-
-    if not precision_scores:
-        return 0.0
-
-    return sum(precision_scores) / len(relevant_docs)
+    # Ranks (1-based) of the relevant documents, in ranked order; the j-th
+    # of them at rank r contributes a precision of j / r
+    hits = map(relevant_docs.__contains__, retrieved_docs)
+    relevant_ranks = compress(count(1), hits)
+    return sum(map(truediv, count(1), relevant_ranks)) / len(relevant_docs)
 
 def main():
     """Main function to run the evaluation."""
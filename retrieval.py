@@ -2,78 +2,300 @@ import sys
 import os
 import json
 import re
-from collections import deque
+import mmap
+import struct
+from collections.abc import Mapping
+from itertools import accumulate
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import time
 
 # --- VByte Decoder ---
+# Strips the terminator bit from every byte in a single C-level pass
+_PAYLOAD_TABLE = bytes(b & 0x7F for b in range(256))
+_CONTINUATION_BYTES = bytes(range(128))
+# A number spanning several bytes: continuation bytes, then its terminator
+_MULTI_BYTE_NUMBER = re.compile(rb'[\x00-\x7f]+[\x80-\xff]')
+
 def vbyte_decode_stream(byte_stream):
     """Decodes a stream of V-Bytes to a list of integers."""
+    byte_stream = bytes(byte_stream)
+    payload = byte_stream.translate(_PAYLOAD_TABLE)
+    num_continuation = len(byte_stream) - len(byte_stream.translate(None, _CONTINUATION_BYTES))
+    if not num_continuation:
+        # Every byte is a terminator, i.e. every number fits in one byte
+        return list(payload)
+
+    if num_continuation * 8 < len(byte_stream):
+        # Mostly single-byte numbers: copy the runs between multi-byte
+        # numbers straight from the payload and only assemble the rest
+        numbers = []
+        last = 0
+        for match in _MULTI_BYTE_NUMBER.finditer(byte_stream):
+            start, end = match.span()
+            numbers += payload[last:start]
+            n = 0
+            for byte in payload[start:end]:
+                n = (n << 7) | byte
+            numbers.append(n)
+            last = end
+        numbers += payload[last:]
+        return numbers
+
     numbers = []
+    append = numbers.append
     n = 0
     for byte in byte_stream:
-        if (byte & 128) == 0:
+        if byte < 128:
             n = (n << 7) | byte
         else:
-            n = (n << 7) | (byte & 127)
-            numbers.append(n)
+            append((n << 7) | (byte & 127))
             n = 0
     return numbers
 
+def vbyte_decode_gaps(byte_stream):
+    """Decodes a stream of V-Byte gaps straight into their running sums."""
+    byte_stream = bytes(byte_stream)
+    if byte_stream and min(byte_stream) & 128:
+        # All single-byte gaps: prefix-sum the stripped bytes directly,
+        # without materialising the list of gaps first
+        return accumulate(byte_stream.translate(_PAYLOAD_TABLE))
+    return accumulate(vbyte_decode_stream(byte_stream))
+
+# --- Doc-ID Bitmaps ---
+# Frequent terms are evaluated as Python ints used as bitsets (bit i = doc i),
+# so AND/OR/NOT on them run as C-level bignum operations
+BITMAP_DENSITY = 0.01 # Terms in more than 1% of docs are decoded into a bitmap
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def bitmap_from_ids(doc_ids, num_bytes: int) -> int:
+    """Packs a collection of internal doc IDs into an int bitmap."""
+    if len(doc_ids) * 32 > num_bytes * 8:
+        # Dense input: mark one '1' digit per doc and let int() parse the
+        # binary string in C, which beats read-modify-writing packed bytes
+        digits = bytearray(b'0') * (num_bytes * 8)
+        for doc_id in doc_ids:
+            digits[doc_id] = 49 # ord('1')
+        digits.reverse() # Most significant bit (highest doc) first
+        return int(digits, 2)
+    bits = bytearray(num_bytes)
+    for doc_id in doc_ids:
+        bits[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(bits, 'little')
+
+def bitmap_to_ids(bitmap: int, num_bytes: int) -> list:
+    """Unpacks an int bitmap into a sorted list of internal doc IDs."""
+    doc_ids = []
+    for i, byte in enumerate(bitmap.to_bytes(num_bytes, 'little')):
+        if byte:
+            base = i << 3
+            doc_ids.extend(base + bit for bit in _BYTE_BITS[byte])
+    return doc_ids
+
+class Lexicon(Mapping):
+    """Read-only term -> entry mapping over terms.txt and the packed lexicon.bin.
+
+    Terms are kept as their sorted list and found by binary search, and
+    entries are unpacked from their fixed-size record on each lookup, so
+    no per-term hash table or dict stays in memory.
+    """
+    def __init__(self, terms, records, fields, record_format):
+        self._terms = terms # Sorted; position i is record i
+        self._records = records
+        self._fields = tuple(fields)
+        self._record = struct.Struct(record_format)
+
+    def _row(self, term) -> int:
+        """Record number of a term, or -1 if it is not in the lexicon."""
+        i = bisect_left(self._terms, term)
+        if i < len(self._terms) and self._terms[i] == term:
+            return i
+        return -1
+
+    def __getitem__(self, term):
+        row = self._row(term)
+        if row < 0:
+            raise KeyError(term)
+        offset = row * self._record.size
+        return dict(zip(self._fields, self._record.unpack_from(self._records, offset)))
+
+    def __contains__(self, term):
+        return self._row(term) >= 0
+
+    def __iter__(self):
+        return iter(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+# Number of decoded postings lists kept per reader
+POSTINGS_CACHE_SIZE = 4096
+# Larger postings files are left to demand paging instead of being prefetched
+PREFETCH_MAX_SIZE = 64 << 20
+
 class CompressedIndexReader:
     """Handles on-demand decompression of postings lists."""
-    def __init__(self, compressed_dir):
+    def __init__(self, compressed_dir, prefetch=True):
         metadata_path = os.path.join(compressed_dir, 'metadata.json')
         index_path = os.path.join(compressed_dir, 'compressed_index.bin')
+        doc_ids_path = os.path.join(compressed_dir, 'doc_ids.txt')
+        terms_path = os.path.join(compressed_dir, 'terms.txt')
+        lexicon_path = os.path.join(compressed_dir, 'lexicon.bin')
+        self.compressed_dir = compressed_dir # Lets worker processes open their own reader
+
+        # Internal IDs are dense (0..N-1) and follow doc_id order, so line i
+        # holds the doc ID of internal ID i and sorting IDs sorts doc IDs
+        with open(doc_ids_path, 'r', encoding='utf-8', newline='') as f:
+            self.int_to_doc_id = f.read().split('\n')[:-1]
 
         with open(metadata_path, 'r', encoding='utf-8') as f:
             metadata = json.load(f)
-            self.lexicon = metadata['lexicon']
-            self.doc_id_map = {int(k): v for k, v in metadata['doc_id_map'].items()}
-            # This set is needed for the NOT operator
-            self.all_doc_ids = set(self.doc_id_map.values())
-            
-        self.index_file = open(index_path, 'rb')
+            total_docs = self.total_docs = metadata['total_docs']
+            self.skip_block_size = metadata['skip_block_size']
+            # Bitmaps cover every doc ID, so this many bytes always suffice
+            self.bitmap_bytes = (total_docs + 7) // 8
+            # Every internal ID 0..N-1 is a doc, so the universe needed by
+            # NOT is simply the bitmap with the lowest N bits set
+            self.all_docs_bitmap = (1 << total_docs) - 1
+
+        # Line i of terms.txt is the term of record i in lexicon.bin
+        with open(terms_path, 'r', encoding='utf-8', newline='') as f:
+            terms = f.read().split('\n')[:-1]
+        with open(lexicon_path, 'rb') as f:
+            self.lexicon = Lexicon(terms, f.read(), metadata['lexicon_fields'],
+                                   metadata['lexicon_record'])
+
+        # Map the postings file once; each lookup is then a plain slice
+        with open(index_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                self.index_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                # Ask the kernel to start paging a small file in now, so the
+                # first lookups do not each stall on a separate page fault
+                if prefetch and size <= PREFETCH_MAX_SIZE and hasattr(mmap, 'MADV_WILLNEED'):
+                    self.index_data.madvise(mmap.MADV_WILLNEED)
+            else:
+                self.index_data = b''
+
+        # Decoded postings are reused across queries; the cache lives on the
+        # instance so it is dropped together with the reader
+        self._cached_postings = lru_cache(maxsize=POSTINGS_CACHE_SIZE)(self._decode_postings)
 
     def get_postings(self, term):
-        """Retrieves and decodes the postings list (doc IDs only) for a term."""
-        if term not in self.lexicon:
-            return set()
+        """Retrieves and decodes the postings list (internal doc IDs) for a term.
+
+        Returns an int bitmap for terms in more than BITMAP_DENSITY of the
+        docs and a frozenset of IDs otherwise; results are cached, so callers
+        must not mutate them.
+        """
+        return self._cached_postings(term)
+
+    def _decode_postings(self, term):
+        entry = self.lexicon.get(term)
+        if entry is None:
+            return frozenset()
             
-        entry = self.lexicon[term]
-        # This doc_count is crucial and must be saved by build_index.py
-        doc_count = entry.get('doc_count', 0) 
+        doc_count = entry['doc_count']
         if doc_count == 0:
-            return set()
-        
-        self.index_file.seek(entry['offset'])
-        compressed_data = self.index_file.read(entry['size'])
+            return frozenset()
         
-        # Decode the byte stream; we only need the docIDs
-        decoded_numbers = vbyte_decode_stream(compressed_data)
-        doc_id_deltas = decoded_numbers[:doc_count]
-        
-        # Reconstruct absolute doc IDs from deltas
-        last_doc_id = 0
-        final_doc_ids = set()
-        for delta in doc_id_deltas:
-            current_doc_id = last_doc_id + delta
-            final_doc_ids.add(self.doc_id_map[current_doc_id])
-            last_doc_id = current_doc_id
-            
-        return final_doc_ids
+        offset = entry['offset']
+        # The doc-ID stream comes first; the positions stream is not needed here
+        # Decode and reconstruct absolute doc IDs from deltas in one pass
+        doc_ids = vbyte_decode_gaps(self.index_data[offset:offset + entry['doc_size']])
+        if doc_count > BITMAP_DENSITY * self.total_docs:
+            # Frequent terms are packed into a bitmap once; the cache keeps it
+            return bitmap_from_ids(list(doc_ids), self.bitmap_bytes)
+        return frozenset(doc_ids)
+
+    def get_skips(self, entry):
+        """Decodes a term's skip table into per-block first doc IDs and byte offsets."""
+        skip_offset = entry['offset'] + entry['size']
+        numbers = vbyte_decode_stream(self.index_data[skip_offset:skip_offset + entry['skip_size']])
+        return list(accumulate(numbers[0::2])), list(accumulate(numbers[1::2]))
+
+    def filter_postings(self, term, candidates) -> set:
+        """Keeps the candidate IDs that occur in a term's postings.
+
+        Uses the skip table to decode only the blocks that may hold a
+        candidate instead of the whole doc-ID stream.
+        """
+        entry = self.lexicon[term]
+        block_first_docs, block_offsets = self.get_skips(entry)
+        block_offsets.append(entry['doc_size']) # End of the last block
+        offset = entry['offset']
+
+        matches = set()
+        blocks = {}
+        for doc_id in candidates:
+            b = bisect_right(block_first_docs, doc_id) - 1
+            if b < 0:
+                continue
+            block = blocks.get(b)
+            if block is None:
+                deltas = vbyte_decode_stream(
+                    self.index_data[offset + block_offsets[b]:offset + block_offsets[b + 1]])
+                # The first gap is relative to the previous block; its doc ID is known
+                block = blocks[b] = set(accumulate(deltas[1:], initial=block_first_docs[b]))
+            if doc_id in block:
+                matches.add(doc_id)
+        return matches
+
+    def get_full_postings(self, term):
+        """Retrieves and decodes the full postings list (doc IDs and positions)."""
+        if term not in self.lexicon:
+            return {}
+
+        entry = self.lexicon[term]
+        offset = entry['offset']
+        pos_offset = offset + entry['doc_size']
+        # Prefix sum and ID lookup both run inside C iterators
+        doc_ids = map(self.int_to_doc_id.__getitem__,
+                      vbyte_decode_gaps(self.index_data[offset:pos_offset]))
+        pos_stream = vbyte_decode_stream(self.index_data[pos_offset:offset + entry['size']])
+
+        # Each doc's block is its position count followed by position gaps.
+        # The per-position work already runs inside accumulate(); only the
+        # walk over the counts is Python, and it is needed anyway to find
+        # where each block starts (a flat CSR layout built with stdlib
+        # iterators measured slower than this loop)
+        full_postings = {}
+        i = 0
+        for doc_id in doc_ids:
+            num_positions = pos_stream[i]
+            i += 1
+            full_postings[doc_id] = list(accumulate(pos_stream[i:i + num_positions]))
+            i += num_positions
+        return full_postings
+
+    def to_doc_ids(self, result) -> list:
+        """Maps an evaluation result (set or bitmap) to doc IDs in sorted order."""
+        if isinstance(result, int):
+            internal_ids = bitmap_to_ids(result, self.bitmap_bytes)
+        else:
+            internal_ids = sorted(result)
+        return list(map(self.int_to_doc_id.__getitem__, internal_ids))
 
     def close(self):
-        self.index_file.close()
+        self._cached_postings.cache_clear()
+        if isinstance(self.index_data, mmap.mmap):
+            self.index_data.close()
 
 # --- Query Processor ---
+# One translate() pass drops ASCII digits and pads parentheses with spaces
+_QUERY_TABLE = str.maketrans({'(': ' ( ', ')': ' ) ', **dict.fromkeys('0123456789')})
+_OPERATORS = frozenset(('and', 'or', 'not', '(', ')'))
+
 def preprocess_query(query_title: str, stopwords: set) -> list:
     """Tokenizes a query and inserts implicit ANDs."""
     query_title = query_title.lower()
-    query_title = re.sub(r'\d', '', query_title)
-    query_title = query_title.replace('(', ' ( ').replace(')', ' ) ')
-    raw_tokens = query_title.split()
+    # translate() only knows ASCII digits; \d also matches other Unicode digits
+    if not query_title.isascii():
+        query_title = re.sub(r'\d', '', query_title)
+    raw_tokens = query_title.translate(_QUERY_TABLE).split()
 
-    operators = {'and', 'or', 'not', '(', ')'}
+    operators = _OPERATORS
     processed_tokens = [
         token for token in raw_tokens 
         if token in operators or token not in stopwords
@@ -92,13 +314,15 @@ def preprocess_query(query_title: str, stopwords: set) -> list:
             
     return final_tokens
 
-def to_postfix(tokens: list) -> deque:
+_PRECEDENCE = {'not': 3, 'and': 2, 'or': 1}
+
+def to_postfix(tokens: list) -> tuple:
     """Converts infix token list to postfix (RPN) using Shunting-yard."""
-    precedence = {'not': 3, 'and': 2, 'or': 1}
-    output = deque()
+    precedence = _PRECEDENCE
+    output = []
     op_stack = []
     for token in tokens:
-        if token not in {'and', 'or', 'not', '(', ')'}:
+        if token not in _OPERATORS:
             output.append(token)
         elif token == '(':
             op_stack.append(token)
@@ -113,29 +337,180 @@ def to_postfix(tokens: list) -> deque:
             op_stack.append(token)
     while op_stack:
         output.append(op_stack.pop())
-    return output
+    return tuple(output)
+
+@lru_cache(maxsize=4096)
+def compile_query(query_title: str) -> tuple:
+    """Parses a query title into postfix form, once per distinct title."""
+    return to_postfix(preprocess_query(query_title, set()))
+
+class Negation:
+    """A pending NOT; an AND chain applies it as a difference instead of a complement."""
+    __slots__ = ('operand',)
+
+    def __init__(self, operand):
+        self.operand = operand
+
+def estimate_size(operand, index_reader: CompressedIndexReader) -> int:
+    """Number of docs an operand matches; the lexicon's doc_count for terms."""
+    if isinstance(operand, str):
+        entry = index_reader.lexicon.get(operand)
+        return entry['doc_count'] if entry else 0
+    if isinstance(operand, Negation):
+        return len(index_reader.int_to_doc_id) - estimate_size(operand.operand, index_reader)
+    if isinstance(operand, int):
+        return operand.bit_count()
+    return len(operand)
 
-def evaluate_postfix(postfix_query: deque, index_reader: CompressedIndexReader):
-    """Evaluates a postfix query using the compressed index reader."""
+def intersect(left, right, index_reader: CompressedIndexReader):
+    """ANDs two operands, each a set of doc IDs or an int bitmap."""
+    if isinstance(left, int) and isinstance(right, int):
+        return left & right
+    if isinstance(left, int):
+        left, right = right, left
+    if isinstance(right, int):
+        # Probe the bitmap's bytes for each ID of the set
+        bits = right.to_bytes(index_reader.bitmap_bytes, 'little')
+        return {doc_id for doc_id in left if bits[doc_id >> 3] >> (doc_id & 7) & 1}
+    return left.intersection(right)
+
+def union(left, right, index_reader: CompressedIndexReader):
+    """ORs two operands, each a set of doc IDs or an int bitmap."""
+    if isinstance(left, int) or isinstance(right, int):
+        if not isinstance(left, int):
+            left = bitmap_from_ids(left, index_reader.bitmap_bytes)
+        if not isinstance(right, int):
+            right = bitmap_from_ids(right, index_reader.bitmap_bytes)
+        return left | right
+    return left.union(right)
+
+def difference(left, right, index_reader: CompressedIndexReader):
+    """Removes the docs of one operand from another (AND NOT)."""
+    if isinstance(left, int):
+        if not isinstance(right, int):
+            right = bitmap_from_ids(right, index_reader.bitmap_bytes)
+        return left & ~right
+    if isinstance(right, int):
+        bits = right.to_bytes(index_reader.bitmap_bytes, 'little')
+        return {doc_id for doc_id in left if not bits[doc_id >> 3] >> (doc_id & 7) & 1}
+    return left.difference(right)
+
+def use_skips(term: str, num_candidates: int, index_reader: CompressedIndexReader) -> bool:
+    """Whether probing a term's skip table beats decoding its whole list.
+
+    Each candidate decodes at most one block, so skipping pays off while
+    the candidates would touch well under half of the blocks.
+    """
+    entry = index_reader.lexicon.get(term)
+    if not entry or not entry['skip_size']:
+        return False
+    return 2 * num_candidates * index_reader.skip_block_size < entry['doc_count']
+
+def resolve(operand, index_reader: CompressedIndexReader):
+    """Turns a stack operand (term, pending AND chain or NOT) into a set or bitmap."""
+    if isinstance(operand, str):
+        return index_reader.get_postings(operand)
+    if isinstance(operand, list):
+        negations = [o for o in operand if isinstance(o, Negation)]
+        # A chain of nothing but NOTs has to start from a complement
+        operands = [o for o in operand if not isinstance(o, Negation)] or [negations.pop()]
+        # Intersect smallest-first so intermediates shrink early, and stop
+        # (without decoding the remaining terms) once nothing is left
+        operands.sort(key=lambda o: estimate_size(o, index_reader))
+        result = resolve(operands[0], index_reader)
+        for other in operands[1:]:
+            if not result:
+                break
+            if isinstance(other, str) and not isinstance(result, int) and \
+                    use_skips(other, len(result), index_reader):
+                result = index_reader.filter_postings(other, result)
+            else:
+                result = intersect(result, resolve(other, index_reader), index_reader)
+        # x AND NOT y is x minus y, which never builds the complement of y
+        for negation in negations:
+            if not result:
+                break
+            result = difference(result, resolve(negation.operand, index_reader), index_reader)
+        return result
+    if isinstance(operand, Negation):
+        # Complement as a bitmap: O(N/8) bytes instead of an N-element set
+        operand = resolve(operand.operand, index_reader)
+        if not isinstance(operand, int):
+            operand = bitmap_from_ids(operand, index_reader.bitmap_bytes)
+        return index_reader.all_docs_bitmap ^ operand
+    return operand
+
+def evaluate_postfix(postfix_query: tuple, index_reader: CompressedIndexReader):
+    """Evaluates a postfix query using the compressed index reader.
+
+    Terms and NOTs stay unresolved on the stack and consecutive ANDs are
+    collected into one chain, so each chain can be intersected in order of
+    size and its NOTs applied as differences.
+    """
     eval_stack = []
-    all_doc_ids = index_reader.all_doc_ids
 
     for token in postfix_query:
         if token == 'and':
             right = eval_stack.pop()
             left = eval_stack.pop()
-            eval_stack.append(left.intersection(right))
+            chain = left if isinstance(left, list) else [left]
+            for operand in (right if isinstance(right, list) else [right]):
+                # A term already in the chain would only be intersected with itself
+                if not (isinstance(operand, str) and operand in chain):
+                    chain.append(operand)
+            eval_stack.append(chain)
         elif token == 'or':
             right = eval_stack.pop()
-            left = eval_stack.pop()
-            eval_stack.append(left.union(right))
+            left = resolve(eval_stack.pop(), index_reader)
+            # Nothing can be added to a side that already holds every doc,
+            # and an empty side adds nothing: skip the other side or the union
+            if left == index_reader.all_docs_bitmap:
+                eval_stack.append(left)
+                continue
+            right = resolve(right, index_reader)
+            # A repeated term resolves to the very same cached postings object
+            if left is right or not right:
+                eval_stack.append(left)
+            elif not left:
+                eval_stack.append(right)
+            else:
+                eval_stack.append(union(left, right, index_reader))
         elif token == 'not':
+            # Left pending, so NOT NOT cancels and an AND can subtract it
             operand = eval_stack.pop()
-            eval_stack.append(all_doc_ids - operand)
+            if isinstance(operand, Negation):
+                eval_stack.append(operand.operand)
+            else:
+                eval_stack.append(Negation(operand))
         else: # Operand
-            eval_stack.append(index_reader.get_postings(token))
+            eval_stack.append(token)
             
-    return eval_stack[0] if eval_stack else set()
+    return resolve(eval_stack[0], index_reader) if eval_stack else set()
+
+def run_query(query: dict, index_reader: CompressedIndexReader) -> str:
+    """Evaluates one query and returns its result lines in TREC format."""
+    qid = query['query_id']
+    result_doc_ids = evaluate_postfix(compile_query(query['title']), index_reader)
+    if not result_doc_ids:
+        return ''
+    # Integer order is doc_id order; map back to strings only here
+    sorted_doc_ids = index_reader.to_doc_ids(result_doc_ids)
+    return ''.join(f"{qid} Q0 {doc_id} {rank} 1.0 bool\n"
+                   for rank, doc_id in enumerate(sorted_doc_ids, 1))
+
+# Below this many queries, starting worker processes costs more than it saves
+PARALLEL_MIN_QUERIES = 64
+
+_worker_reader = None
+
+def _init_worker(compressed_dir: str) -> None:
+    """Opens one reader per worker; the mapped postings file is shared via the page cache."""
+    global _worker_reader
+    # The parent's reader has already asked for the file to be paged in
+    _worker_reader = CompressedIndexReader(compressed_dir, prefetch=False)
+
+def _run_worker_query(query: dict) -> str:
+    return run_query(query, _worker_reader)
 
 def boolean_retrieval(index_reader: CompressedIndexReader, path_to_query_file: str, output_dir: str):
     """Main function to run Boolean retrieval."""
@@ -164,20 +539,20 @@ def boolean_retrieval(index_reader: CompressedIndexReader, path_to_query_file: s
         
     output_path = os.path.join(output_dir, 'docids.txt')
 
-    with open(output_path, 'w', encoding='utf-8') as f_out:
-        for query in queries:
-            qid = query['query_id']
-            title = query['title']
-            
-            query_tokens = preprocess_query(title, set())
-            postfix_query = to_postfix(query_tokens)
-            result_doc_ids = evaluate_postfix(postfix_query, index_reader)
-            
-            if result_doc_ids:
-                sorted_doc_ids = sorted(list(result_doc_ids))
-                for rank, doc_id in enumerate(sorted_doc_ids, 1):
-                    line = f"{qid} Q0 {doc_id} {rank} 1.0 bool\n"
-                    f_out.write(line)
+    # Each query's lines arrive as one string; a 1 MiB buffer batches them into few syscalls
+    with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f_out:
+        # Queries are independent, so large query files are spread over
+        # processes (threads would serialise on the GIL); map keeps their order
+        workers = min(os.cpu_count() or 1, len(queries) // PARALLEL_MIN_QUERIES)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(index_reader.compressed_dir,)) as executor:
+                for lines in executor.map(_run_worker_query, queries,
+                                          chunksize=max(1, len(queries) // (4 * workers))):
+                    f_out.write(lines)
+        else:
+            for query in queries:
+                f_out.write(run_query(query, index_reader))
     
     print(f"Retrieval results saved to {output_path}")
 
@@ -198,7 +573,7 @@ if __name__ == '__main__':
             # Pass the reader object to the retrieval function
             boolean_retrieval(reader, query_file, output_dir)
         except FileNotFoundError:
-            print("Error: Compressed index files not found. Ensure metadata.json and compressed_index.bin are present.")
+            print("Error: Compressed index files not found. Ensure metadata.json, doc_ids.txt and compressed_index.bin are present.")
         finally:
             # Ensure the file handle is closed
             if reader:
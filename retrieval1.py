@@ -5,63 +5,7 @@ import re
 from collections import deque
 import time
 
-# --- VByte Decoder ---
-def vbyte_decode_stream(byte_stream):
-    """Decodes a stream of V-Bytes to a list of integers."""
-    numbers = []
-    n = 0
-    for byte in byte_stream:
-        if (byte & 128) == 0:
-            n = (n << 7) | byte
-        else:
-            n = (n << 7) | (byte & 127)
-            numbers.append(n)
-            n = 0
-    return numbers
-
-class CompressedIndexReader:
-    """Handles on-demand decompression of postings lists."""
-    def __init__(self, compressed_dir):
-        metadata_path = os.path.join(compressed_dir, 'metadata.json')
-        index_path = os.path.join(compressed_dir, 'compressed_index.bin')
-
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-            self.lexicon = metadata['lexicon']
-            self.doc_id_map = {int(k): v for k, v in metadata['doc_id_map'].items()}
-            self.all_doc_ids = set(self.doc_id_map.values())
-            
-        self.index_file = open(index_path, 'rb')
-
-    def get_postings(self, term):
-        """Retrieves and decodes the postings list (doc IDs only) for a term."""
-        if term not in self.lexicon:
-            return set()
-            
-        entry = self.lexicon[term]
-        doc_count = entry['doc_count']
-        
-        self.index_file.seek(entry['offset'])
-        compressed_data = self.index_file.read(entry['size'])
-        
-        # Decode the entire byte stream for this term
-        decoded_numbers = vbyte_decode_stream(compressed_data)
-        
-        # The first `doc_count` numbers are the docID deltas
-        doc_id_deltas = decoded_numbers[:doc_count]
-        
-        # Reconstruct absolute doc IDs from deltas
-        last_doc_id = 0
-        final_doc_ids = set()
-        for delta in doc_id_deltas:
-            current_doc_id = last_doc_id + delta
-            final_doc_ids.add(self.doc_id_map[current_doc_id])
-            last_doc_id = current_doc_id
-            
-        return final_doc_ids
-
-    def close(self):
-        self.index_file.close()
+from retrieval import CompressedIndexReader
 
 # --- Query Processor ---
 def preprocess_query(query_title: str, stopwords: set) -> list:
@@ -116,7 +60,8 @@ def to_postfix(tokens: list) -> deque:
 def evaluate_postfix(postfix_query: deque, index_reader: CompressedIndexReader):
     """Evaluates a postfix query using the compressed index reader."""
     eval_stack = []
-    all_doc_ids = index_reader.all_doc_ids
+    # The shared reader works on internal int IDs; this evaluator uses doc ID strings
+    all_doc_ids = set(index_reader.int_to_doc_id)
 
     for token in postfix_query:
         if token == 'and':
@@ -131,7 +76,7 @@ def evaluate_postfix(postfix_query: deque, index_reader: CompressedIndexReader):
             operand = eval_stack.pop()
             eval_stack.append(all_doc_ids - operand)
         else: # Operand
-            eval_stack.append(index_reader.get_postings(token))
+            eval_stack.append(set(index_reader.to_doc_ids(index_reader.get_postings(token))))
             
     return eval_stack[0] if eval_stack else set()
 
@@ -183,7 +128,7 @@ if __name__ == '__main__':
             # Pass the reader object to the retrieval function
             boolean_retrieval(reader, query_file, output_dir)
         except FileNotFoundError:
-            print("Error: Compressed index files not found. Ensure metadata.json and compressed_index.bin are in the specified directory.")
+            print("Error: Compressed index files not found. Ensure metadata.json, lexicon.bin, terms.txt, doc_ids.txt and compressed_index.bin are in the specified directory.")
         finally:
             # Ensure the file handle is closed
             if reader:
@@ -2,20 +2,67 @@ import sys
 import os
 import json
 import re
+import mmap
+from heapq import merge
+from itertools import groupby
+from concurrent.futures import ProcessPoolExecutor
 import time
 
+# Shared decoder for corpus lines; skips json.loads' per-call argument handling
+_json_decode = json.JSONDecoder().decode
+
+def read_json_lines(filepath: str):
+    """Yields the parsed documents of a JSON Lines file, skipping empty lines."""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                if line.strip(): # Ensure the line is not empty
+                    yield _json_decode(line.decode('utf-8'))
+
+_DIGIT_TABLE = str.maketrans('', '', '0123456789')
+
 def tokenize(text: str, stopwords: set) -> list:
     """Applies the tokenization process to a string."""
     # 1. Preprocessing: Lowercase, Remove digits
     text = text.lower()
-    text = re.sub(r'\d', '', text)
+    # translate() only knows ASCII digits; \d also matches other Unicode digits
+    text = text.translate(_DIGIT_TABLE) if text.isascii() else re.sub(r'\d', '', text)
     
     # 2. Split on whitespace
     raw_tokens = text.split()
     
     # 3. Remove stopwords
+    if not stopwords:
+        return raw_tokens
     return [token for token in raw_tokens if token not in stopwords]
 
+_worker_stopwords = None
+
+def _init_worker(stopwords: frozenset) -> None:
+    """Hands the stopwords to a worker once instead of pickling them per file."""
+    global _worker_stopwords
+    _worker_stopwords = stopwords
+
+def _file_vocab(filepath: str) -> list:
+    """Returns the sorted unique tokens of a single corpus file."""
+    stopwords = _worker_stopwords
+    vocabulary = set()
+    for doc in read_json_lines(filepath):
+        doc_content = []
+        # Concatenate all fields except 'doc_id'
+        for key, value in doc.items():
+            if key != 'doc_id':
+                doc_content.append(str(value))
+        
+        full_text = ' '.join(doc_content)
+        # Stopwords are dropped from the file's set once below, instead of
+        # being looked up for every token of every document
+        vocabulary.update(tokenize(full_text, frozenset()))
+    vocabulary -= stopwords
+    return sorted(vocabulary)
+
 def build_vocab(corpus_dir: str, stopwords_file: str, vocab_dir: str) -> None:
     """
     Builds a vocabulary from the corpus documents.
@@ -23,44 +70,40 @@ def build_vocab(corpus_dir: str, stopwords_file: str, vocab_dir: str) -> None:
     # Load stopwords
     try:
         with open(stopwords_file, 'r', encoding='utf-8') as f:
-            stopwords = set(line.strip() for line in f)
+            stopwords = frozenset(line.strip() for line in f)
     except FileNotFoundError:
         print(f"Error: Stopwords file not found at {stopwords_file}")
         return
 
-    vocabulary = set()
-    
-    # Process each document in the corpus directory
-    for filename in os.listdir(corpus_dir):
-        if filename.endswith(".json"):
-            filepath = os.path.join(corpus_dir, filename)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip(): # Ensure the line is not empty
-                        doc = json.loads(line) # Use json.loads() for strings
-                        doc_content = []
-                        # Concatenate all fields except 'doc_id'
-                        for key, value in doc.items():
-                            if key != 'doc_id':
-                                doc_content.append(str(value))
-                        
-                        full_text = ' '.join(doc_content)
-                        tokens = tokenize(full_text, stopwords)
-                        vocabulary.update(tokens)
+    filepaths = [os.path.join(corpus_dir, filename)
+                 for filename in os.listdir(corpus_dir)
+                 if filename.endswith(".json")]
 
-    # Sort the vocabulary lexicographically
-    sorted_vocab = sorted(list(vocabulary))
+    # Each file is tokenized independently, in parallel when there are several
+    workers = min(os.cpu_count() or 1, len(filepaths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(stopwords,)) as executor:
+            file_vocabs = list(executor.map(_file_vocab, filepaths))
+    else:
+        _init_worker(stopwords)
+        file_vocabs = list(map(_file_vocab, filepaths))
     
     # Save the vocabulary to vocab.txt
     if not os.path.exists(vocab_dir):
         os.makedirs(vocab_dir)
     
+    # Every per-file list is sorted and unique, so merging them and dropping
+    # repeats streams the lexicographically sorted vocabulary without ever
+    # building one corpus-wide set
     vocab_path = os.path.join(vocab_dir, 'vocab.txt')
+    vocab_size = 0
     with open(vocab_path, 'w', encoding='utf-8') as f:
-        for token in sorted_vocab:
+        for token, _ in groupby(merge(*file_vocabs)):
             f.write(token + '\n')
+            vocab_size += 1
             
-    print(f"Vocabulary created with {len(sorted_vocab)} unique tokens.")
+    print(f"Vocabulary created with {vocab_size} unique tokens.")
     print(f"Saved to {vocab_path}")
 
 